@@ -1,74 +1,193 @@
+import asyncio
+import aiohttp
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import hashlib
 import json
+import orjson
+import re
 import time
 import random
+from pathlib import Path
+from urllib.parse import urlsplit
 from config import GEMINI_API_KEY, GEMINI_API_URL, HEADERS
 
+# Shared session so repeated fetches reuse keep-alive connections instead of
+# paying a fresh TCP+TLS handshake per URL; also shared across the company
+# worker threads on purpose — header-only auth, no cookie jar writes, and
+# pooling per thread would forfeit exactly the socket reuse this exists for
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.headers.setdefault("Accept-Encoding", "gzip, deflate, br")
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5)
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Precompiled link filters; matching compiled alternations beats rebuilding
+# keyword lists and re-lowercasing per link on pages with hundreds of anchors
+EXCLUDE_RE = re.compile(
+    r'/(about|contact|privacy|terms|careers|cookie|support|industries|'
+    r'resources|partners|newsroom|page|tag|faq|help)(/|$)'
+)
+INCLUDE_RE = re.compile(r'/(blog|news|press|article|post)/')
+SLUG_RE = re.compile(r'[-_/]|20(1[0-9]|2[0-9])')
+
+# Only the tags we actually read; lxml + SoupStrainer skips building the
+# rest of the DOM, which dominates per-article CPU time
+POST_TAGS = SoupStrainer(['h1', 'title', 'p', 'time'])
+
+
+# On-disk Gemini response cache: reruns, retries and dev iteration hit the
+# same prompts, and each LLM round trip costs seconds plus tokens. Bumping
+# PROMPT_VERSION invalidates entries when prompt wording changes.
+_GEMINI_CACHE_DIR = Path('.gemini_cache')
+_GEMINI_TTL = 7 * 86400
+PROMPT_VERSION = 'v1'
+
 
 def call_gemini(prompt: str):
-    response = requests.post(GEMINI_API_URL, json={
+    key = hashlib.sha256(f"{PROMPT_VERSION}|{prompt}".encode()).hexdigest()
+    cache_path = _GEMINI_CACHE_DIR / f"{key}.txt"
+    try:
+        if time.time() - cache_path.stat().st_mtime < _GEMINI_TTL:
+            return cache_path.read_text()
+    except OSError:
+        pass
+
+    response = SESSION.post(GEMINI_API_URL, json={
         "contents": [{"parts": [{"text": prompt}]}]
     })
     response.raise_for_status()
-    return response.json()['candidates'][0]['content']['parts'][0]['text']
+    result = response.json()['candidates'][0]['content']['parts'][0]['text']
+
+    try:
+        _GEMINI_CACHE_DIR.mkdir(exist_ok=True)
+        cache_path.write_text(result)
+    except OSError:
+        pass
+    return result
+
+
+# Company -> blog URL mapping is essentially static, so persist it across
+# runs and skip the Gemini round trip for companies we've already resolved
+_URL_CACHE_PATH = Path('.blog_urls.json')
+try:
+    _URL_CACHE = json.loads(_URL_CACHE_PATH.read_text())
+except (OSError, ValueError):
+    _URL_CACHE = {}
 
 
 def find_official_blog_url(company_name: str) -> str:
+    cached = _URL_CACHE.get(company_name.lower())
+    if cached:
+        return cached
+
     prompt = f"""yYou are a web researcher. Find the official blog, news, or press release page URL of the company "{company_name}". Return ONLY the URL. Example output:
 https://stripe.com/blog
 Now return only the official blog or news page URL for: {company_name}"""
     url = call_gemini(prompt).strip().split('\n')[0]
+
+    if url.startswith('http'):
+        _URL_CACHE[company_name.lower()] = url
+        try:
+            _URL_CACHE_PATH.write_text(json.dumps(_URL_CACHE, indent=2))
+        except OSError as e:
+            print(f"Warning: could not persist blog URL cache: {e}")
     return url
 
 
 def extract_posts(blog_url: str):
     print(f"Scraping: {blog_url}")
-    response = requests.get(blog_url, headers=HEADERS, timeout=10)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Collect all links on the page
-    links = [a['href'] for a in soup.find_all('a', href=True)]
-    full_links = list(set([
-        link if link.startswith('http') else blog_url.rstrip('/') + '/' + link.lstrip('/')
-        for link in links
-    ]))
-
-    # Filter likely article links
+    response = SESSION.get(blog_url, timeout=10)
+
+    # Harvest links straight from a partial lxml parse; make_links_absolute
+    # also handles <base href> correctly, unlike manual prefix joining
+    doc = lxml.html.fromstring(response.content)
+    doc.make_links_absolute(blog_url, resolve_base_href=True)
+    full_links = dict.fromkeys(
+        link for _, _, link, _ in doc.iterlinks() if link.startswith('http')
+    )
+
+    # Filter likely article links; each URL is split and lowercased exactly
+    # once, and the filters run on the path only so keywords in hosts or
+    # query strings can't match
     valid_links = []
     for link in full_links:
-        link = link.split('#')[0]  # Remove fragment
-        if any(x in link.lower() for x in [
-            '/about', '/contact', '/privacy', '/terms', '/careers',
-            '/cookie', '/support', '/industries', '/resources',
-            '/partners', '/newsroom', '/page/', '/tag/', '/faq', '/help'
-        ]):
+        parts = urlsplit(link)
+        clean = parts._replace(fragment='').geturl() if parts.fragment else link
+        low = parts.path.lower()
+        if EXCLUDE_RE.search(low):
             continue
-        # More flexible blog post detection
-        if any(x in link.lower() for x in ['/blog/', '/news/', '/press/', '/article/', '/post/']):
-            # Check if it looks like an article (has date or slug pattern)
-            if any(x in link.lower() for x in ['-', '_', '/', '2024', '2023', '2022', '2021', '2020']):
-                valid_links.append(link)
-
-    # Remove duplicates
-    valid_links = list(set(valid_links))
+        # More flexible blog post detection: article path plus date/slug pattern
+        if INCLUDE_RE.search(low) and SLUG_RE.search(low):
+            valid_links.append(clean)
+
+    # Remove duplicates, preserving order
+    valid_links = list(dict.fromkeys(valid_links))
+
+    return asyncio.run(_fetch_all_posts(valid_links))
+
+
+async def _fetch(session, url):
+    """Fetch a single URL and return its HTML text"""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        return await response.text()
+
+
+async def _fetch_and_parse(sem, session, url):
+    async with sem:
+        print(f"Fetching post: {url}")
+        html = await _fetch(session, url)
+        # Small randomized delay to stay polite while still overlapping requests
+        await asyncio.sleep(random.uniform(0.1, 0.3))
+    post = _parse_post(url, html)
+    # The Gemini date fallback is a blocking second network hop; run it in a
+    # worker thread so it overlaps with the other in-flight fetches instead
+    # of stalling the event loop
+    if post and not post['date']:
+        post['date'] = await asyncio.to_thread(
+            get_date_from_llm, post['headline'], post['content'], url
+        )
+    return post
+
+
+async def _fetch_all_posts(urls):
+    """Fetch and parse all candidate article URLs concurrently"""
+    sem = asyncio.Semaphore(8)
+    connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        results = await asyncio.gather(
+            *[_fetch_and_parse(sem, session, url) for url in urls],
+            return_exceptions=True
+        )
 
     posts = []
-    for url in valid_links:
-        try:
-            post = extract_post_content(url)
-            if post:
-                posts.append(post)
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-        time.sleep(random.uniform(1, 2))  # polite scraping
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            print(f"Error scraping {url}: {result}")
+        elif result:
+            posts.append(result)
     return posts
 
 
 def extract_post_content(url: str):
     print(f"Fetching post: {url}")
-    response = requests.get(url, headers=HEADERS, timeout=10)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    response = SESSION.get(url, timeout=10)
+    post = _parse_post(url, response.text)
+    if post and not post['date']:
+        post['date'] = get_date_from_llm(post['headline'], post['content'], url)
+    return post
+
+
+def _parse_post(url: str, html: str):
+    soup = BeautifulSoup(html, 'lxml', parse_only=POST_TAGS)
 
     headline_tag = soup.find(['h1', 'title'])
     headline = headline_tag.get_text(strip=True) if headline_tag else "No Title"
@@ -82,9 +201,6 @@ def extract_post_content(url: str):
     if not date and date_tag:
         date = date_tag.get_text(strip=True)
 
-    if not date:
-        date = get_date_from_llm(headline, content, url)
-
     return {
         "headline": headline,
         "date": date,
@@ -132,8 +248,8 @@ def run_pipeline(company_name: str, save_to_file=False):
 
         if save_to_file:
             filename = f"{company_name.replace(' ', '_')}_blog_posts.json"
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
+            with open(filename, "wb") as f:
+                f.write(orjson.dumps(posts, option=orjson.OPT_INDENT_2))
             print(f"Saved {len(posts)} posts to {filename}")
 
         print(f"Found {len(posts)} blog posts for {company_name}")
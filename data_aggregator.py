@@ -1,152 +1,180 @@
-import json
+import hashlib
+import orjson
+from collections import Counter
 from datetime import datetime
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+# Single analyzer shared by all aggregator instances, created on first use so
+# importing this module doesn't pay the vaderSentiment import plus lexicon
+# load. VADER's per-text tokenization is the dominant CPU cost of aggregation,
+# so identical texts (cross-posted headlines, syndicated articles, re-runs)
+# are scored only once. The cache is keyed on a content digest rather than
+# the text itself so memoizing long transcripts doesn't pin them in memory.
+_ANALYZER = None
+_SCORE_CACHE = {}
+_SCORE_CACHE_MAX = 8192
+
+def _get_analyzer():
+    global _ANALYZER
+    if _ANALYZER is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _ANALYZER = SentimentIntensityAnalyzer()
+    return _ANALYZER
+
+def _score_text(text):
+    key = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+    if key not in _SCORE_CACHE:
+        if len(_SCORE_CACHE) >= _SCORE_CACHE_MAX:
+            _SCORE_CACHE.clear()
+        _SCORE_CACHE[key] = _get_analyzer().polarity_scores(text)['compound']
+    return _SCORE_CACHE[key]
+
+def _desc(text):
+    """Truncate long content to a 200-char preview"""
+    return text[:200] + '...' if len(text) > 200 else text
+
+# Per-source mapping onto the standard article schema. 'description' and
+# 'image_url' are None when the source has no such field (the description is
+# then derived from the content, and the image left blank); 'url' is None for
+# sources that need a computed URL rather than a key lookup.
+SOURCE_SCHEMA = {
+    'blog': {
+        'headline': 'headline', 'content': 'content', 'url': 'source_url',
+        'description': None, 'image_url': None, 'date': 'date',
+        'summary_prefix': 'Blog post', 'score_description': False,
+    },
+    'google_search': {
+        'headline': 'headline', 'content': 'full_content', 'url': 'url',
+        'description': 'description', 'image_url': 'image_url', 'date': 'date',
+        'summary_prefix': 'News article', 'score_description': True,
+    },
+    'reddit': {
+        'headline': 'title', 'content': 'content', 'url': None,
+        'description': None, 'image_url': None, 'date': 'date',
+        'summary_prefix': 'Reddit post', 'score_description': False,
+    },
+    'youtube': {
+        'headline': 'title', 'content': 'transcript', 'url': 'url',
+        'description': None, 'image_url': None, 'date': 'published',
+        'summary_prefix': 'YouTube video', 'score_description': False,
+    },
+    'linkedin': {
+        'headline': 'headline', 'content': 'full_content', 'url': 'url',
+        'description': 'description', 'image_url': 'image_url', 'date': 'date',
+        'summary_prefix': 'LinkedIn activity', 'score_description': False,
+    },
+}
 
 class DataAggregator:
-    def __init__(self):
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
-    
+    @property
+    def sentiment_analyzer(self):
+        return _get_analyzer()
+
     def analyze_sentiment(self, text):
         """Analyze sentiment of given text"""
-        if not text:
+        # Trivial inputs (empty, whitespace, lone headline separator) can't
+        # carry sentiment; skip the full lexicon scan
+        if not text or len(text.strip()) < 4:
             return 'neutral', 0.0
-        
-        score = self.sentiment_analyzer.polarity_scores(text)['compound']
+
+        score = _score_text(text)
         sentiment = 'positive' if score >= 0.05 else 'negative' if score <= -0.05 else 'neutral'
         return sentiment, score
-    
-    def standardize_blog_data(self, blog_data):
-        """Convert blog post data to standard format"""
+
+    def _standardize(self, items, source):
+        """Convert one source's raw items to the standard article format"""
+        cfg = SOURCE_SCHEMA[source]
         standardized = []
-        for post in blog_data:
-            content = f"{post.get('headline', '')} {post.get('content', '')}"
-            sentiment, sentiment_score = self.analyze_sentiment(content)
-            
+        for item in items:
+            headline = item.get(cfg['headline'], '')
+            content = item.get(cfg['content'], '')
+            description = item.get(cfg['description'], '') if cfg['description'] else _desc(content)
+
+            if cfg['url']:
+                url = item.get(cfg['url'], '')
+            else:
+                url = f"https://reddit.com{item.get('permalink', '')}" if item.get('permalink') else ''
+
+            if not headline and not content:
+                sentiment, sentiment_score = 'neutral', 0.0
+            elif cfg['score_description']:
+                sentiment, sentiment_score = self.analyze_sentiment(f"{headline} {description} {content}")
+            else:
+                sentiment, sentiment_score = self.analyze_sentiment(f"{headline} {content}")
+
             standardized.append({
-                'headline': post.get('headline', ''),
-                'description': post.get('content', '')[:200] + '...' if len(post.get('content', '')) > 200 else post.get('content', ''),
-                'url': post.get('source_url', ''),
-                'image_url': '',
-                'full_content': post.get('content', ''),
+                'headline': headline,
+                'description': description,
+                'url': url,
+                'image_url': item.get(cfg['image_url'], '') if cfg['image_url'] else '',
+                'full_content': content,
                 'sentiment': sentiment,
                 'sentiment_score': sentiment_score,
-                'summary': f"Blog post: {post.get('headline', '')}",
-                'source': 'blog',
-                'date': post.get('date', 'Unknown')
+                'summary': f"{cfg['summary_prefix']}: {headline}",
+                'source': source,
+                'date': item.get(cfg['date'], 'Unknown')
             })
         return standardized
-    
+
+    def standardize_blog_data(self, blog_data):
+        """Convert blog post data to standard format"""
+        return self._standardize(blog_data, 'blog')
+
     def standardize_google_data(self, google_data):
         """Convert Google search data to standard format"""
-        standardized = []
-        for article in google_data:
-            content = f"{article.get('headline', '')} {article.get('description', '')} {article.get('full_content', '')}"
-            sentiment, sentiment_score = self.analyze_sentiment(content)
-            
-            standardized.append({
-                'headline': article.get('headline', ''),
-                'description': article.get('description', ''),
-                'url': article.get('url', ''),
-                'image_url': article.get('image_url', ''),
-                'full_content': article.get('full_content', ''),
-                'sentiment': sentiment,
-                'sentiment_score': sentiment_score,
-                'summary': f"News article: {article.get('headline', '')}",
-                'source': 'google_search',
-                'date': article.get('date', 'Unknown')
-            })
-        return standardized
-    
+        return self._standardize(google_data, 'google_search')
+
     def standardize_reddit_data(self, reddit_data):
         """Convert Reddit data to standard format"""
-        standardized = []
-        for post in reddit_data:
-            content = f"{post.get('title', '')} {post.get('content', '')}"
-            sentiment, sentiment_score = self.analyze_sentiment(content)
-            
-            standardized.append({
-                'headline': post.get('title', ''),
-                'description': post.get('content', '')[:200] + '...' if len(post.get('content', '')) > 200 else post.get('content', ''),
-                'url': f"https://reddit.com{post.get('permalink', '')}" if post.get('permalink') else '',
-                'image_url': '',
-                'full_content': post.get('content', ''),
-                'sentiment': sentiment,
-                'sentiment_score': sentiment_score,
-                'summary': f"Reddit post: {post.get('title', '')}",
-                'source': 'reddit',
-                'date': post.get('date', 'Unknown')
-            })
-        return standardized
-    
+        return self._standardize(reddit_data, 'reddit')
+
     def standardize_youtube_data(self, youtube_data):
         """Convert YouTube data to standard format"""
-        standardized = []
-        for video in youtube_data:
-            content = f"{video.get('title', '')} {video.get('transcript', '')}"
-            sentiment, sentiment_score = self.analyze_sentiment(content)
-            
-            standardized.append({
-                'headline': video.get('title', ''),
-                'description': video.get('transcript', '')[:200] + '...' if len(video.get('transcript', '')) > 200 else video.get('transcript', ''),
-                'url': video.get('url', ''),
-                'image_url': '',
-                'full_content': video.get('transcript', ''),
-                'sentiment': sentiment,
-                'sentiment_score': sentiment_score,
-                'summary': f"YouTube video: {video.get('title', '')}",
-                'source': 'youtube',
-                'date': video.get('published', 'Unknown')
-            })
-        return standardized
+        return self._standardize(youtube_data, 'youtube')
 
     def standardize_linkedin_data(self, linkedin_data):
         """Convert LinkedIn data to standard format"""
-        standardized = []
-        for post in linkedin_data:
-            content = f"{post.get('headline', '')} {post.get('full_content', '')}"
-            sentiment, sentiment_score = self.analyze_sentiment(content)
-            
-            standardized.append({
-                'headline': post.get('headline', ''),
-                'description': post.get('description', ''),
-                'url': post.get('url', ''),
-                'image_url': post.get('image_url', ''),
-                'full_content': post.get('full_content', ''),
-                'sentiment': sentiment,
-                'sentiment_score': sentiment_score,
-                'summary': f"LinkedIn activity: {post.get('headline', '')}",
-                'source': 'linkedin',
-                'date': post.get('date', 'Unknown')
-            })
-        return standardized
+        return self._standardize(linkedin_data, 'linkedin')
 
     def aggregate_company_data(self, company_name, blog_data=None, google_data=None, reddit_data=None, youtube_data=None, linkedin_data=None):
         """Aggregate all data sources for a company"""
+        # Nothing collected (the common failure-to-scrape case): skip
+        # standardization and sentiment scoring entirely
+        if not any((blog_data, google_data, reddit_data, youtube_data, linkedin_data)):
+            return {
+                'company_name': company_name,
+                'overall_sentiment': 'neutral',
+                'overall_sentiment_score': 0.0,
+                'total_articles': 0,
+                'articles': [],
+                'sources_count': {source: 0 for source in SOURCE_SCHEMA}
+            }
+
         all_articles = []
-        
-        if blog_data:
-            all_articles.extend(self.standardize_blog_data(blog_data))
-        
-        if google_data:
-            all_articles.extend(self.standardize_google_data(google_data))
-        
-        if reddit_data:
-            all_articles.extend(self.standardize_reddit_data(reddit_data))
-        
-        if youtube_data:
-            all_articles.extend(self.standardize_youtube_data(youtube_data))
-
-        if linkedin_data:
-            all_articles.extend(self.standardize_linkedin_data(linkedin_data))
-
-        # Calculate overall sentiment
+
+        for source, data in (
+            ('blog', blog_data),
+            ('google_search', google_data),
+            ('reddit', reddit_data),
+            ('youtube', youtube_data),
+            ('linkedin', linkedin_data),
+        ):
+            if data:
+                all_articles.extend(self._standardize(data, source))
+
+        # Calculate overall sentiment and per-source counts in a single pass
+        score_sum = 0.0
+        source_counts = Counter()
+        for article in all_articles:
+            score_sum += article['sentiment_score']
+            source_counts[article['source']] += 1
+
         if all_articles:
-            avg_sentiment_score = sum(article['sentiment_score'] for article in all_articles) / len(all_articles)
+            avg_sentiment_score = score_sum / len(all_articles)
             overall_sentiment = 'positive' if avg_sentiment_score >= 0.05 else 'negative' if avg_sentiment_score <= -0.05 else 'neutral'
         else:
             overall_sentiment = 'neutral'
             avg_sentiment_score = 0.0
-        
+
         return {
             'company_name': company_name,
             'overall_sentiment': overall_sentiment,
@@ -154,16 +182,14 @@ class DataAggregator:
             'total_articles': len(all_articles),
             'articles': all_articles,
             'sources_count': {
-                'blog': len([a for a in all_articles if a['source'] == 'blog']),
-                'google_search': len([a for a in all_articles if a['source'] == 'google_search']),
-                'reddit': len([a for a in all_articles if a['source'] == 'reddit']),
-                'youtube': len([a for a in all_articles if a['source'] == 'youtube']),
-                'linkedin': len([a for a in all_articles if a['source'] == 'linkedin'])
+                source: source_counts.get(source, 0)
+                for source in SOURCE_SCHEMA
             }
         }
-    
+
     def save_aggregated_data(self, aggregated_data, filename):
         """Save aggregated data to JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(aggregated_data, f, indent=2, ensure_ascii=False)
+        # orjson writes bytes, so open in binary mode and skip the decode
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(aggregated_data, option=orjson.OPT_INDENT_2))
         print(f"Aggregated data saved to {filename}")
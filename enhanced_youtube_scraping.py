@@ -1,11 +1,24 @@
-import json
-import time
-from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import YOUTUBE_API_KEY
 
+# Module-level API client: rebuilding the discovery client per search drops
+# the pooled HTTP connection and re-reads the discovery document each time.
+# googleapiclient itself is imported on first use so entry points that never
+# touch YouTube don't pay its import cost.
+_YOUTUBE = None
+
+def _client():
+    global _YOUTUBE
+    if _YOUTUBE is None:
+        from googleapiclient.discovery import build
+        _YOUTUBE = build("youtube", "v3", developerKey=YOUTUBE_API_KEY,
+                         cache_discovery=False, static_discovery=True)
+    return _YOUTUBE
+
 def get_transcript(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
         return " ".join([x['text'] for x in transcript])
@@ -14,21 +27,23 @@ def get_transcript(video_id):
     except Exception as e:
         return None
 
-def get_channel_subscribers(youtube, channel_id):
+def get_channel_subscribers_map(youtube, channel_ids):
+    """Fetch subscriber counts for up to 50 channels in a single API call"""
+    subs_map = {}
     try:
         response = youtube.channels().list(
             part="statistics",
-            id=channel_id
+            id=",".join(channel_ids),
+            maxResults=50
         ).execute()
-        if response["items"]:
-            subs = int(response["items"][0]["statistics"].get("subscriberCount", 0))
-            return subs
+        for channel in response.get("items", []):
+            subs_map[channel["id"]] = int(channel["statistics"].get("subscriberCount", 0))
     except:
         pass
-    return 0
+    return subs_map
 
 def search_top_youtube_videos(query, max_results=50):
-    youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    youtube = _client()
 
     request = youtube.search().list(
         q=query,
@@ -39,33 +54,34 @@ def search_top_youtube_videos(query, max_results=50):
     )
     response = request.execute()
 
-    results = []
+    # One batched channels.list call instead of one per video
+    channel_ids = list({item["snippet"]["channelId"] for item in response["items"]})
+    subs_map = get_channel_subscribers_map(youtube, channel_ids) if channel_ids else {}
 
+    # Keep only videos from large channels, then fetch their transcripts
+    # concurrently — transcript calls are pure network I/O at 1-3s each
+    candidates = []
     for item in response["items"]:
         video_id = item["id"]["videoId"]
-        title = item["snippet"]["title"]
-        channel_title = item["snippet"]["channelTitle"]
         channel_id = item["snippet"]["channelId"]
-        published_at = item["snippet"]["publishedAt"]
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
 
-        transcript = get_transcript(video_id)
-        if transcript is None:
+        if subs_map.get(channel_id, 0) < 100_000:
             continue
 
-        subs = get_channel_subscribers(youtube, channel_id)
-        if subs < 100_000:
-            continue
-
-        results.append({
-            "title": title,
-            "channel": channel_title,
-            "published": published_at,
-            "url": video_url,
-            "transcript": transcript
-        })
+        candidates.append((video_id, {
+            "title": item["snippet"]["title"],
+            "channel": item["snippet"]["channelTitle"],
+            "published": item["snippet"]["publishedAt"],
+            "url": f"https://www.youtube.com/watch?v={video_id}"
+        }))
 
-        time.sleep(0.5)  # Respect API rate limits
+    results = []
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = {executor.submit(get_transcript, vid): meta for vid, meta in candidates}
+        for future in as_completed(futures):
+            transcript = future.result()
+            if transcript:
+                results.append({**futures[future], "transcript": transcript})
 
     return results
 
@@ -98,6 +114,6 @@ if __name__ == "__main__":
     else:
         # Save to JSON
         filename = f"youtube_top_videos_{company.lower().replace(' ', '_')}.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(videos, f, ensure_ascii=False, indent=4)
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(videos, option=orjson.OPT_INDENT_2))
         print(f"\n✅ Results saved to '{filename}' with {len(videos)} videos.")
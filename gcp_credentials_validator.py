@@ -11,12 +11,16 @@ import json
 import sys
 from pathlib import Path
 
+# Parsed credential dicts, keyed by path, so the credential tests below can
+# reuse them instead of re-reading the files from disk
+_CREDS_CACHE = {}
+
 def check_file_exists(filepath: str, description: str) -> bool:
     """Check if a file exists and is readable"""
     if not os.path.exists(filepath):
         print(f"❌ {description} not found: {filepath}")
         return False
-    
+
     try:
         with open(filepath, 'r') as f:
             content = f.read()
@@ -29,28 +33,17 @@ def check_file_exists(filepath: str, description: str) -> bool:
         print(f"❌ Error reading {description}: {e}")
         return False
 
-def validate_json_credentials(filepath: str, description: str) -> bool:
-    """Validate JSON credential file structure"""
+def load_and_validate_credentials(filepath: str, description: str) -> bool:
+    """Load a JSON credential file once and validate its structure"""
     try:
         with open(filepath, 'r') as f:
             creds = json.load(f)
-        
-        required_fields = ['type', 'project_id', 'private_key_id', 'private_key', 'client_email']
-        missing_fields = [field for field in required_fields if field not in creds]
-        
-        if missing_fields:
-            print(f"❌ {description} missing required fields: {missing_fields}")
-            return False
-        
-        if creds.get('type') != 'service_account':
-            print(f"❌ {description} is not a service account credential")
-            return False
-            
-        print(f"✅ {description} is valid JSON service account credential")
-        print(f"   Project ID: {creds.get('project_id')}")
-        print(f"   Service Account: {creds.get('client_email')}")
-        return True
-        
+    except FileNotFoundError:
+        print(f"❌ {description} not found: {filepath}")
+        return False
+    except PermissionError as e:
+        print(f"❌ Error reading {description}: {e}")
+        return False
     except json.JSONDecodeError as e:
         print(f"❌ {description} is not valid JSON: {e}")
         return False
@@ -58,6 +51,24 @@ def validate_json_credentials(filepath: str, description: str) -> bool:
         print(f"❌ Error validating {description}: {e}")
         return False
 
+    required_fields = ['type', 'project_id', 'private_key_id', 'private_key', 'client_email']
+    missing_fields = [field for field in required_fields if field not in creds]
+
+    if missing_fields:
+        print(f"❌ {description} missing required fields: {missing_fields}")
+        return False
+
+    if creds.get('type') != 'service_account':
+        print(f"❌ {description} is not a service account credential")
+        return False
+
+    _CREDS_CACHE[filepath] = creds
+
+    print(f"✅ {description} is valid JSON service account credential")
+    print(f"   Project ID: {creds.get('project_id')}")
+    print(f"   Service Account: {creds.get('client_email')}")
+    return True
+
 def validate_gcp_configuration():
     """Validate GCP project configuration"""
     try:
@@ -90,9 +101,13 @@ def test_gcs_credentials():
     """Test GCS credentials by attempting to initialize client"""
     try:
         from google.cloud import storage
-        
-        # Try to initialize client with credentials
-        client = storage.Client.from_service_account_json('gcp_storage_credentials.json')
+
+        # Reuse the parsed credentials instead of re-reading the file
+        creds = _CREDS_CACHE.get('gcp_storage_credentials.json')
+        if creds is not None:
+            client = storage.Client.from_service_account_info(creds)
+        else:
+            client = storage.Client.from_service_account_json('gcp_storage_credentials.json')
         
         # Try to list buckets (basic permission test)
         buckets = list(client.list_buckets())
@@ -129,25 +144,14 @@ def main():
     
     all_valid = True
     
-    # Check credential files exist
-    print("\n📁 Checking credential files...")
-    storage_creds_valid = check_file_exists('gcp_storage_credentials.json', 'GCS credentials')
-    vertex_creds_valid = check_file_exists('gcp_vertex_ai_credentials.json', 'Vertex AI credentials')
+    # Load and validate credential files in a single read each
+    print("\n📁 Validating credential files...")
+    storage_creds_valid = load_and_validate_credentials('gcp_storage_credentials.json', 'GCS credentials')
+    vertex_creds_valid = load_and_validate_credentials('gcp_vertex_ai_credentials.json', 'Vertex AI credentials')
     config_valid = check_file_exists('gcp_project_config.py', 'GCP project configuration')
-    
+
     all_valid = all_valid and storage_creds_valid and vertex_creds_valid and config_valid
-    
-    # Validate JSON structure
-    if storage_creds_valid:
-        print("\n🔍 Validating GCS credentials structure...")
-        storage_json_valid = validate_json_credentials('gcp_storage_credentials.json', 'GCS credentials')
-        all_valid = all_valid and storage_json_valid
-    
-    if vertex_creds_valid:
-        print("\n🔍 Validating Vertex AI credentials structure...")
-        vertex_json_valid = validate_json_credentials('gcp_vertex_ai_credentials.json', 'Vertex AI credentials')
-        all_valid = all_valid and vertex_json_valid
-    
+
     # Validate configuration
     if config_valid:
         print("\n🔍 Validating GCP project configuration...")
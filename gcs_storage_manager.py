@@ -14,67 +14,120 @@ Features:
 
 import os
 import json
+import hashlib
 import logging
+import mmap
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 
-try:
-    from google.cloud import storage
-    from google.cloud.exceptions import GoogleCloudError
-except ImportError:
-    print("❌ Google Cloud Storage library not installed.")
-    print("Install with: pip install google-cloud-storage")
-    raise
-
 from config import GCS_CREDENTIALS_PATH
 from gcp_project_config import GCS_BUCKET_NAME, GCP_PROJECT_ID, get_gcs_report_path, get_gcs_full_url
+from utils import company_slug
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One shared client+bucket per (credentials, project, bucket) triple; the
+# client is thread-safe, and rebuilding it per manager instance re-parses the
+# credentials and pays a fresh TLS handshake in every worker
+_CLIENT_CACHE = {}
+
+# google-cloud-storage is imported on first use (it costs several hundred ms)
+# and cached here so entry points that never touch GCS skip it entirely
+_storage = None
+
+def _get_storage():
+    global _storage
+    if _storage is None:
+        try:
+            from google.cloud import storage
+        except ImportError:
+            print("❌ Google Cloud Storage library not installed.")
+            print("Install with: pip install google-cloud-storage")
+            raise
+        _storage = storage
+    return _storage
+
+def _get_client_and_bucket(credentials_path: str, project_id: str, bucket_name: str):
+    key = (credentials_path, project_id, bucket_name)
+    if key not in _CLIENT_CACHE:
+        client = _get_storage().Client.from_service_account_json(
+            credentials_path,
+            project=project_id
+        )
+
+        # Enlarge the urllib3 connection pool (default pool_maxsize=10);
+        # under concurrent uploads/downloads the default pool discards
+        # connections and serializes on TCP/TLS re-handshakes
+        try:
+            import requests.adapters
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=128,
+                pool_maxsize=128,
+                max_retries=3,
+                pool_block=True
+            )
+            client._http.mount("https://", adapter)
+            client._http._auth_request.session.mount("https://", adapter)
+        except AttributeError as e:
+            logger.warning(f"⚠️ Could not resize GCS connection pool: {e}")
+
+        _CLIENT_CACHE[key] = (client, client.bucket(bucket_name))
+    return _CLIENT_CACHE[key]
+
 class GCSStorageManager:
     """Manages Google Cloud Storage operations for market intelligence reports"""
-    
-    def __init__(self, credentials_path: str = None):
+
+    # Reports above this size are uploaded with concurrent chunks (MPU)
+    CHUNKED_UPLOAD_THRESHOLD = 32 * 1024 * 1024
+    CHUNK_SIZE = 16 * 1024 * 1024
+
+    # Per-company manifest of the last uploaded content hash, so re-runs
+    # of an unchanged report skip the upload entirely
+    MANIFEST_DIR = Path('.gcs_upload_cache')
+
+    def __init__(self, credentials_path: str = None, verify_bucket: bool = False):
         """
         Initialize GCS Storage Manager
-        
+
         Args:
             credentials_path: Path to GCS service account credentials JSON file
+            verify_bucket: Probe bucket existence with an extra HTTP GET
+                (useful at startup; skipped by default so pooled workers
+                don't each pay the round trip)
         """
         self.credentials_path = credentials_path or GCS_CREDENTIALS_PATH
         self.bucket_name = GCS_BUCKET_NAME
         self.project_id = GCP_PROJECT_ID
         self.client = None
         self.bucket = None
-        
-        self._initialize_client()
-    
-    def _initialize_client(self):
+
+        self._initialize_client(verify_bucket)
+
+    def _initialize_client(self, verify_bucket: bool = False):
         """Initialize GCS client with service account credentials"""
         try:
             if not os.path.exists(self.credentials_path):
                 raise FileNotFoundError(f"GCS credentials not found: {self.credentials_path}")
-            
-            # Initialize client with service account credentials
-            self.client = storage.Client.from_service_account_json(
+
+            # Reuse the shared client and bucket for these credentials
+            self.client, self.bucket = _get_client_and_bucket(
                 self.credentials_path,
-                project=self.project_id
+                self.project_id,
+                self.bucket_name
             )
-            
-            # Get bucket reference
-            self.bucket = self.client.bucket(self.bucket_name)
-            
+
             # Test bucket access
-            if not self.bucket.exists():
+            if verify_bucket and not self.bucket.exists():
                 raise ValueError(f"GCS bucket does not exist: {self.bucket_name}")
-            
+
             logger.info(f"✅ GCS client initialized successfully")
             logger.info(f"   Project: {self.project_id}")
             logger.info(f"   Bucket: {self.bucket_name}")
-            
+
         except Exception as e:
             logger.error(f"❌ Failed to initialize GCS client: {e}")
             raise
@@ -110,13 +163,20 @@ class GCSStorageManager:
             gcs_path = get_gcs_report_path(company_name, date_str, time_str)
             gcs_url = get_gcs_full_url(company_name, date_str, time_str)
             
-            # Read HTML content
-            with open(html_file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
+            # Size from the filesystem; no need to read the file into memory
+            file_size = os.path.getsize(html_file_path)
+
+            # Unchanged content re-uploaded for the same company is a no-op:
+            # return the prior upload's result instead of a new object
+            content_sha = self._file_sha256(html_file_path)
+            cached = self._manifest_lookup(company_name, content_sha)
+            if cached:
+                logger.info(f"♻️ Report unchanged; reusing {cached.get('gcs_url')}")
+                return cached
+
             # Create blob and upload
             blob = self.bucket.blob(gcs_path)
-            
+
             # Set metadata
             metadata = {
                 'company': company_name,
@@ -124,22 +184,27 @@ class GCSStorageManager:
                 'timestamp': timestamp.isoformat(),
                 'format': 'html',
                 'source': 'market_intelligence_pipeline',
-                'file_size': str(len(html_content.encode('utf-8')))
+                'file_size': str(file_size)
             }
             blob.metadata = metadata
-            
+
             # Set content type
             blob.content_type = 'text/html'
-            
-            # Upload content
-            blob.upload_from_string(html_content, content_type='text/html')
-            
+
+            # Upload straight from disk: with a known Content-Length the
+            # client issues a single-shot upload instead of resumable chunks.
+            # Large combined reports switch to resumable mode with a tuned
+            # chunk size so they stream near link bandwidth.
+            if file_size > 8 * 1024 * 1024:
+                blob.chunk_size = self.CHUNK_SIZE * 2  # 32 MiB
+            blob.upload_from_filename(html_file_path, content_type='text/html')
+
             logger.info(f"✅ Report uploaded successfully")
             logger.info(f"   Company: {company_name}")
             logger.info(f"   GCS Path: {gcs_path}")
-            logger.info(f"   Size: {len(html_content)} characters")
-            
-            return {
+            logger.info(f"   Size: {file_size} bytes")
+
+            result = {
                 'success': True,
                 'gcs_url': gcs_url,
                 'gcs_path': gcs_path,
@@ -147,9 +212,11 @@ class GCSStorageManager:
                 'date': date_str,
                 'timestamp': timestamp.isoformat(),
                 'metadata': metadata,
-                'file_size': len(html_content)
+                'file_size': file_size
             }
-            
+            self._manifest_record(company_name, content_sha, result)
+            return result
+
         except Exception as e:
             logger.error(f"❌ Failed to upload report: {e}")
             return {
@@ -159,6 +226,118 @@ class GCSStorageManager:
                 'file_path': html_file_path
             }
     
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        """Hash file contents via an mmap view: one hashlib call over the
+        page cache instead of a Python-level read loop."""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:  # mmap rejects zero-length files
+                return hashlib.sha256(b'').hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+
+    def _manifest_path(self, company_name: str) -> Path:
+        return self.MANIFEST_DIR / f"{company_slug(company_name)}.json"
+
+    def _manifest_lookup(self, company_name: str, content_sha: str) -> Optional[Dict[str, Any]]:
+        try:
+            manifest = json.loads(self._manifest_path(company_name).read_text())
+        except (OSError, ValueError):
+            return None
+        return manifest.get(content_sha)
+
+    def _manifest_record(self, company_name: str, content_sha: str, result: Dict[str, Any]):
+        path = self._manifest_path(company_name)
+        try:
+            self.MANIFEST_DIR.mkdir(exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_text(json.dumps({content_sha: result}))
+            os.replace(tmp, path)  # atomic: readers never see a partial file
+        except OSError as e:
+            logger.warning(f"⚠️ Could not update upload manifest: {e}")
+
+    def upload_reports(self, items: List[tuple], max_workers: int = 32) -> List[Dict[str, Any]]:
+        """
+        Upload multiple HTML reports concurrently
+
+        Args:
+            items: List of (html_file_path, company_name) tuples
+            max_workers: Maximum number of concurrent uploads
+
+        Returns:
+            List of upload result dictionaries, in input order
+        """
+        items = list(items)
+        results = [None] * len(items)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.upload_report, path, company): index
+                for index, (path, company) in enumerate(items)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        logger.info(f"✅ Uploaded {sum(1 for r in results if r and r.get('success'))}/{len(items)} reports")
+        return results
+
+    def bulk_upload_reports(self, file_company_pairs: List[tuple], max_workers: int = 32) -> List[str]:
+        """
+        Upload many HTML reports through transfer_manager in one batch
+
+        Small reports go out in a single parallel upload_many call; reports
+        over CHUNKED_UPLOAD_THRESHOLD use a concurrent multipart upload.
+
+        Args:
+            file_company_pairs: List of (html_file_path, company_name) tuples
+            max_workers: Maximum number of concurrent uploads
+
+        Returns:
+            List of GCS paths that were uploaded successfully
+        """
+        try:
+            from google.cloud.storage import transfer_manager
+        except ImportError:
+            logger.warning("⚠️ transfer_manager unavailable; using threaded uploads")
+            results = self.upload_reports(file_company_pairs, max_workers=max_workers)
+            return [r['gcs_path'] for r in results if r and r.get('success')]
+
+        timestamp = datetime.now()
+        date_str = timestamp.strftime("%Y-%m-%d")
+        time_str = timestamp.strftime("%H-%M-%S")
+
+        uploaded = []
+        small_pairs = []
+        for path, company in file_company_pairs:
+            gcs_path = get_gcs_report_path(company, date_str, time_str)
+            blob = self.bucket.blob(gcs_path)
+            blob.content_type = 'text/html'
+
+            if os.path.getsize(path) > self.CHUNKED_UPLOAD_THRESHOLD:
+                try:
+                    transfer_manager.upload_chunks_concurrently(
+                        path, blob, chunk_size=self.CHUNK_SIZE, max_workers=8
+                    )
+                    uploaded.append(gcs_path)
+                except Exception as e:
+                    logger.error(f"❌ Chunked upload failed for {path}: {e}")
+            else:
+                small_pairs.append((path, blob))
+
+        if small_pairs:
+            results = transfer_manager.upload_many(
+                small_pairs, max_workers=max_workers, raise_exception=False
+            )
+            for (path, blob), result in zip(small_pairs, results):
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Failed to upload {path}: {result}")
+                else:
+                    uploaded.append(blob.name)
+
+        logger.info(f"✅ Bulk upload complete: {len(uploaded)} reports")
+        return uploaded
+
     def list_company_reports(self, company_name: str, date_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List all reports for a company, optionally filtered by date
@@ -171,27 +350,34 @@ class GCSStorageManager:
             List of report metadata dictionaries
         """
         try:
-            company_clean = company_name.replace(' ', '_').replace('.', '').lower()
+            company_clean = company_slug(company_name)
             prefix = f"{company_clean}/"
             
             if date_filter:
                 prefix = f"{company_clean}/{date_filter}/"
             
-            blobs = self.client.list_blobs(self.bucket_name, prefix=prefix)
-            
+            # Paginate and request only the fields we read so large listings
+            # neither transfer nor hold full Blob payloads
+            blobs = self.client.list_blobs(
+                self.bucket_name,
+                prefix=prefix,
+                page_size=1000,
+                fields="items(name,size,timeCreated,updated,metadata),nextPageToken"
+            )
+
             reports = []
             for blob in blobs:
-                if blob.name.endswith('.html'):
-                    report_info = {
-                        'gcs_path': blob.name,
-                        'gcs_url': f"gs://{self.bucket_name}/{blob.name}",
-                        'size': blob.size,
-                        'created': blob.time_created.isoformat() if blob.time_created else None,
-                        'updated': blob.updated.isoformat() if blob.updated else None,
-                        'metadata': blob.metadata or {}
-                    }
-                    reports.append(report_info)
-            
+                if not blob.name.endswith('.html'):
+                    continue
+                reports.append({
+                    'gcs_path': blob.name,
+                    'gcs_url': f"gs://{self.bucket_name}/{blob.name}",
+                    'size': blob.size,
+                    'created': blob.time_created.isoformat() if blob.time_created else None,
+                    'updated': blob.updated.isoformat() if blob.updated else None,
+                    'metadata': blob.metadata or {}
+                })
+
             # Sort by creation time (newest first)
             reports.sort(key=lambda x: x['created'] or '', reverse=True)
             
@@ -213,8 +399,42 @@ class GCSStorageManager:
         Returns:
             Latest report metadata or None if not found
         """
-        reports = self.list_company_reports(company_name, date_str)
-        return reports[0] if reports else None
+        try:
+            company_clean = company_slug(company_name)
+            prefix = f"{company_clean}/{date_str}/"
+
+            blobs = self.client.list_blobs(
+                self.bucket_name,
+                prefix=prefix,
+                page_size=1000,
+                fields="items(name,size,timeCreated,updated,metadata),nextPageToken"
+            )
+
+            # Report names embed the time (HH-MM-SS.html), so the
+            # lexicographically greatest name is the newest — one streaming
+            # pass, no list materialization or sort
+            latest = None
+            for blob in blobs:
+                if not blob.name.endswith('.html'):
+                    continue
+                if latest is None or blob.name > latest.name:
+                    latest = blob
+
+            if latest is None:
+                return None
+
+            return {
+                'gcs_path': latest.name,
+                'gcs_url': f"gs://{self.bucket_name}/{latest.name}",
+                'size': latest.size,
+                'created': latest.time_created.isoformat() if latest.time_created else None,
+                'updated': latest.updated.isoformat() if latest.updated else None,
+                'metadata': latest.metadata or {}
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get latest report: {e}")
+            return None
     
     def download_report(self, gcs_path: str, local_path: str) -> bool:
         """
@@ -227,22 +447,23 @@ class GCSStorageManager:
         Returns:
             True if successful, False otherwise
         """
+        from google.cloud.exceptions import NotFound
         try:
             blob = self.bucket.blob(gcs_path)
-            
-            if not blob.exists():
-                logger.error(f"❌ Report not found in GCS: {gcs_path}")
-                return False
-            
+
             # Create directory if needed
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            
-            # Download file
+
+            # Download directly; a missing blob raises NotFound, which is one
+            # round-trip cheaper than probing blob.exists() first
             blob.download_to_filename(local_path)
-            
+
             logger.info(f"✅ Report downloaded: {gcs_path} -> {local_path}")
             return True
-            
+
+        except NotFound:
+            logger.error(f"❌ Report not found in GCS: {gcs_path}")
+            return False
         except Exception as e:
             logger.error(f"❌ Failed to download report: {e}")
             return False
@@ -257,17 +478,16 @@ class GCSStorageManager:
         Returns:
             True if successful, False otherwise
         """
+        from google.cloud.exceptions import NotFound
         try:
             blob = self.bucket.blob(gcs_path)
-            
-            if not blob.exists():
-                logger.warning(f"⚠️ Report not found for deletion: {gcs_path}")
-                return True  # Already deleted
-            
             blob.delete()
             logger.info(f"🗑️ Report deleted: {gcs_path}")
             return True
-            
+
+        except NotFound:
+            logger.warning(f"⚠️ Report not found for deletion: {gcs_path}")
+            return True  # Already deleted
         except Exception as e:
             logger.error(f"❌ Failed to delete report: {e}")
             return False
@@ -1,61 +1,16 @@
+import asyncio
+import heapq
+import operator
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from datetime import datetime
 from config import GEMINI_API_KEY, GEMINI_API_URL
 
-class GeminiProcessor:
-    def __init__(self):
-        self.api_key = GEMINI_API_KEY
-        self.api_url = GEMINI_API_URL
-
-    def call_gemini(self, prompt):
-        """Make API call to Gemini"""
-        try:
-            response = requests.post(self.api_url, json={
-                "contents": [{"parts": [{"text": prompt}]}]
-            })
-            response.raise_for_status()
-            html_content = response.json()['candidates'][0]['content']['parts'][0]['text']
-
-            # Clean up malformed HTML responses from Gemini
-            if html_content:
-                # Remove markdown code blocks if present
-                if '```html' in html_content:
-                    # Extract content between ```html and ```
-                    start_marker = '```html'
-                    end_marker = '```'
-                    start_idx = html_content.find(start_marker)
-                    if start_idx != -1:
-                        start_idx += len(start_marker)
-                        end_idx = html_content.find(end_marker, start_idx)
-                        if end_idx != -1:
-                            html_content = html_content[start_idx:end_idx].strip()
-
-                # Remove any remaining markdown artifacts
-                html_content = html_content.replace('```html', '').replace('```', '').strip()
-
-            return html_content
-        except Exception as e:
-            print(f"Error calling Gemini API: {e}")
-            return None
-
-    def create_portfolio_prompt(self, company_data):
-        """Create the portfolio analysis prompt for a single company"""
-
-        # Filter for positive/neutral articles as specified
-        filtered_articles = [
-            article for article in company_data['articles']
-            if article['sentiment'] in ['positive', 'neutral']
-        ]
-
-        # If no positive/neutral articles, use all articles
-        if not filtered_articles:
-            filtered_articles = company_data['articles']
-
-        # Limit articles to prevent token overflow (keep top 20 by sentiment score)
-        filtered_articles = sorted(filtered_articles, key=lambda x: x['sentiment_score'], reverse=True)[:20]
-
-        prompt = f"""You are "Portfolio Performance Analyst AI."
+# Static prompt template built once at import; per-call work is reduced to a
+# single .format with the company-specific values
+_PORTFOLIO_PROMPT_TEMPLATE = """You are "Portfolio Performance Analyst AI."
 
 **Objective:**
 Generate a concise, insightful, and actionable executive-level portfolio update email for venture investors, using the provided company-specific JSON news data. Prioritize positive or neutral sentiment articles for thematic synthesis.
@@ -64,12 +19,12 @@ Generate a concise, insightful, and actionable executive-level portfolio update
 Sophisticated, time-constrained investors demanding clarity, precision, and strategic foresight.
 
 **Input Data:**
-Company: {company_data['company_name']}
-Total Articles Analyzed: {company_data['total_articles']}
-Overall Sentiment: {company_data['overall_sentiment']}
-Sources: Blog ({company_data['sources_count']['blog']}), News ({company_data['sources_count']['google_search']}), Reddit ({company_data['sources_count']['reddit']}), YouTube ({company_data['sources_count']['youtube']}){', LinkedIn (' + str(company_data['sources_count'].get('linkedin', 0)) + ')' if company_data['sources_count'].get('linkedin', 0) > 0 else ''}{', Gmail (' + str(company_data['sources_count'].get('gmail', 0)) + ')' if company_data['sources_count'].get('gmail', 0) > 0 else ''}
+Company: {company_name}
+Total Articles Analyzed: {total_articles}
+Overall Sentiment: {overall_sentiment}
+Sources: {sources_line}
 
-JSON Articles: {json.dumps(filtered_articles, indent=2)}
+JSON Articles: {articles_json}
 
 **Communication Mandate: Top-Tier Consultant Standard (e.g., McKinsey, BCG, Bain)**
 *   **Tone:** Executive presence—authoritative, confident, composed.
@@ -81,14 +36,14 @@ JSON Articles: {json.dumps(filtered_articles, indent=2)}
 
 Generate a complete HTML document with the following structure:
 
-1.  **Subject:** Portfolio Update: {company_data['company_name']} – Key Developments & Outlook ({datetime.now().strftime('%B %Y')})
-2.  **Headline Lead:** (1 impactful sentence summarizing {company_data['company_name']}'s period.)
+1.  **Subject:** Portfolio Update: {company_name} – Key Developments & Outlook ({month_year})
+2.  **Headline Lead:** (1 impactful sentence summarizing {company_name}'s period.)
 3.  **I. Executive Summary:**
     *   (Max 3 concise, impactful bullet points – Rule of 3. Synthesize *critical takeaways*.)
 4.  **II. Key Developments & Themes:**
     *   (2-4 themes. For each: Clear Heading + *Brief, synthesized explanation from articles. Focus on *what happened* and its *immediate significance*. **No individual article summaries.**)
 5.  **III. Overall Sentiment Analysis:**
-    *   **Overall Sentiment:** {company_data['overall_sentiment'].title()}
+    *   **Overall Sentiment:** {overall_sentiment_title}
     *   **Rationale:** (1-2 sentences justifying aggregated sentiment from news balance/impact.)
 6.  **IV. Strategic Implications for Investors:**
     *   (2-3 forward-looking bullet points – The "So What?". Articulate what developments *mean for the investment*. Consultant-grade.)
@@ -102,7 +57,146 @@ Generate a complete HTML document with the following structure:
 
 **Constraint:** All analysis derived *solely* from provided JSON."""
 
-        return prompt
+_BY_SENTIMENT_SCORE = operator.itemgetter('sentiment_score')
+_ALLOWED_SENTIMENTS = frozenset(('positive', 'neutral'))
+
+class GeminiProcessor:
+    def __init__(self):
+        self.api_key = GEMINI_API_KEY
+        self.api_url = GEMINI_API_URL
+
+        # Keep-alive session: one TLS handshake for all company reports,
+        # with automatic backoff on transient Gemini errors
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # Retry's default method set excludes POST, which is all
+                # this session sends; generateContent is safe to repeat
+                # on 429/5xx since the request wasn't served
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"}
+            )
+        ))
+
+    def call_gemini(self, prompt):
+        """Make API call to Gemini"""
+        try:
+            response = self.session.post(self.api_url, json={
+                "contents": [{"parts": [{"text": prompt}]}]
+            }, timeout=(5, 120))
+            response.raise_for_status()
+            html_content = response.json()['candidates'][0]['content']['parts'][0]['text']
+            return self._clean_fences(html_content)
+        except Exception as e:
+            print(f"Error calling Gemini API: {e}")
+            return None
+
+    @staticmethod
+    def _clean_fences(html_content):
+        """Unwrap a markdown ```html fence in a single pass"""
+        if not html_content:
+            return html_content
+        _, fence, rest = html_content.partition('```html')
+        if fence:
+            body, _, _ = rest.partition('```')
+            return body.strip()
+        return html_content.strip()
+
+    async def _call_gemini_async(self, session, prompt):
+        """Async counterpart of call_gemini sharing one aiohttp session"""
+        import aiohttp
+
+        async with session.post(self.api_url, json={
+            "contents": [{"parts": [{"text": prompt}]}]
+        }, timeout=aiohttp.ClientTimeout(total=120)) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return self._clean_fences(data['candidates'][0]['content']['parts'][0]['text'])
+
+    async def _generate_report_async(self, sem, session, company_data):
+        prompt = self.create_portfolio_prompt(company_data)
+        async with sem:
+            try:
+                html_content = await self._call_gemini_async(session, prompt)
+            except Exception as e:
+                print(f"Error calling Gemini API: {e}")
+                html_content = None
+
+        if not html_content:
+            return self.create_fallback_html(company_data)
+
+        if not html_content.strip().startswith('<'):
+            html_content = self.wrap_in_html(html_content, company_data['company_name'])
+
+        return html_content
+
+    async def generate_company_reports_async(self, company_data_list, max_in_flight=8):
+        """Generate reports for many companies with bounded concurrency"""
+        # Deferred so importing this module (and main.py) doesn't require
+        # aiohttp; the serial path works without it
+        import aiohttp
+
+        sem = asyncio.Semaphore(max_in_flight)
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(*[
+                self._generate_report_async(sem, session, company_data)
+                for company_data in company_data_list
+            ])
+
+    def generate_company_reports(self, company_data_list, max_in_flight=8):
+        """Sync wrapper: generate all company reports concurrently
+
+        LLM round trips are 5-30s each, so running them in parallel turns a
+        sum of latencies into roughly a max.
+        """
+        return asyncio.run(
+            self.generate_company_reports_async(company_data_list, max_in_flight)
+        )
+
+    def create_portfolio_prompt(self, company_data):
+        """Create the portfolio analysis prompt for a single company"""
+
+        # Filter for positive/neutral articles as specified, fused with the
+        # top-20 selection so the filtered list is never materialized; the
+        # trim prevents token overflow and nlargest is O(N log 20)
+        articles = company_data['articles']
+        filtered_articles = heapq.nlargest(
+            20,
+            (a for a in articles if a['sentiment'] in _ALLOWED_SENTIMENTS),
+            key=_BY_SENTIMENT_SCORE
+        )
+
+        # If no positive/neutral articles, use all articles
+        if not filtered_articles:
+            filtered_articles = heapq.nlargest(20, articles, key=_BY_SENTIMENT_SCORE)
+
+        counts = company_data['sources_count']
+        sources = [
+            f"Blog ({counts['blog']})",
+            f"News ({counts['google_search']})",
+            f"Reddit ({counts['reddit']})",
+            f"YouTube ({counts['youtube']})"
+        ]
+        for key, label in (('linkedin', 'LinkedIn'), ('gmail', 'Gmail')):
+            if counts.get(key, 0) > 0:
+                sources.append(f"{label} ({counts[key]})")
+
+        return _PORTFOLIO_PROMPT_TEMPLATE.format(
+            company_name=company_data['company_name'],
+            total_articles=company_data['total_articles'],
+            overall_sentiment=company_data['overall_sentiment'],
+            overall_sentiment_title=company_data['overall_sentiment'].title(),
+            sources_line=', '.join(sources),
+            # Compact JSON: Gemini parses it identically and the pretty
+            # printer roughly doubles the billed token count
+            articles_json=json.dumps(filtered_articles, separators=(',', ':'), ensure_ascii=False),
+            month_year=datetime.now().strftime('%B %Y')
+        )
 
     def generate_company_report(self, company_data):
         """Generate HTML report for a single company"""
@@ -178,9 +272,26 @@ Generate a complete HTML document with the following structure:
 </body>
 </html>"""
 
+    @staticmethod
+    def _extract_body(report_html):
+        """Slice out the <body> content of a report without full-string splits"""
+        start = report_html.find('<body>')
+        if start == -1:
+            return report_html
+        end = report_html.find('</body>', start)
+        if end == -1:
+            return report_html
+        body_content = report_html[start + len('<body>'):end]
+        # Remove container div if present
+        if '<div class="container">' in body_content:
+            body_content = body_content.replace('<div class="container">', '').replace('</div>', '', 1)
+        return body_content
+
     def combine_company_reports(self, company_reports):
         """Combine multiple company reports into a single HTML document"""
-        combined_html = """<!DOCTYPE html>
+        # Accumulate fragments and join once; += on a string of N reports
+        # reallocates the whole document per append
+        parts = ["""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -203,36 +314,29 @@ Generate a complete HTML document with the following structure:
         <h1>Portfolio Performance Update - Multi-Company Analysis</h1>
         <div class="toc">
             <h2>Table of Contents</h2>
-            <ul>"""
+            <ul>"""]
 
         # Add table of contents
-        for i, (company_name, _) in enumerate(company_reports.items()):
-            combined_html += f'<li><a href="#company-{i}">{company_name}</a></li>'
+        for i, company_name in enumerate(company_reports):
+            parts.append(f'<li><a href="#company-{i}">{company_name}</a></li>')
 
-        combined_html += """
+        parts.append("""
             </ul>
-        </div>"""
+        </div>""")
 
         # Add individual company reports
+        last = len(company_reports) - 1
         for i, (company_name, report_html) in enumerate(company_reports.items()):
-            # Extract body content from individual reports
-            if '<body>' in report_html and '</body>' in report_html:
-                body_content = report_html.split('<body>')[1].split('</body>')[0]
-                # Remove container div if present
-                if '<div class="container">' in body_content:
-                    body_content = body_content.replace('<div class="container">', '').replace('</div>', '', 1)
-            else:
-                body_content = report_html
-
-            combined_html += f"""
+            body_content = self._extract_body(report_html)
+            parts.append(f"""
         <div class="company-report" id="company-{i}">
             {body_content}
         </div>
-        {'' if i == len(company_reports) - 1 else '<div class="company-separator"></div>'}"""
+        {'' if i == last else '<div class="company-separator"></div>'}""")
 
-        combined_html += """
+        parts.append("""
     </div>
 </body>
-</html>"""
+</html>""")
 
-        return combined_html
+        return ''.join(parts)
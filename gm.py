@@ -1,17 +1,61 @@
 import os
-import json
+import io
+import time
 import base64
-from bs4 import BeautifulSoup
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import orjson
+from html.parser import HTMLParser
+from utils import company_slug
 
 # Set Gmail read-only scope
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+class _TextExtractor(HTMLParser):
+    """Collect text nodes from HTML, stopping once enough for the preview.
+
+    Much cheaper than building a BeautifulSoup tree per email when the body
+    is truncated to 1000 chars anyway.
+    """
+    LIMIT = 2048
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buf = io.StringIO()
+        self._size = 0
+        self._skip = 0  # depth inside <script>/<style>
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._skip or self._size >= self.LIMIT:
+            return
+        self._buf.write(data)
+        self._size += len(data)
+
+    def text(self):
+        return self._buf.getvalue()
+
+def _html_to_text(html):
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    return parser.text()
+
 def authenticate_gmail(user_tag):
     """Authenticate and cache token for a specific Gmail user (identified by user_tag)."""
+    # Deferred so importing this module doesn't pay the Google auth stack
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     creds = None
     token_file = f'token_{user_tag}.json'
 
@@ -29,14 +73,47 @@ def authenticate_gmail(user_tag):
     return build('gmail', 'v1', credentials=creds)
 
 def search_messages(service, query):
-    """Search Gmail for messages matching the query."""
-    results = service.users().messages().list(userId='me', q=query).execute()
-    messages = results.get('messages', [])
+    """Search Gmail for messages matching the query, following pagination."""
+    messages = []
+    page_token = None
+    while True:
+        results = service.users().messages().list(
+            userId='me', q=query, maxResults=500, pageToken=page_token
+        ).execute()
+        messages.extend(results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
     return messages
 
 def get_message_details(service, msg_id):
     """Extract sender, subject, date, and plain body from a message ID."""
     msg = service.users().messages().get(userId='me', id=msg_id, format='full').execute()
+    return _parse_message(msg)
+
+def fetch_message_details_batch(service, msg_ids, batch_size=100):
+    """Fetch message payloads via the Gmail batch API, 100 per round-trip."""
+    details = {}
+
+    def _collect(request_id, response, exception):
+        if exception is not None:
+            print(f"[ERROR] Failed to fetch message {request_id}: {exception}")
+            return
+        details[request_id] = _parse_message(response)
+
+    for start in range(0, len(msg_ids), batch_size):
+        batch = service.new_batch_http_request(callback=_collect)
+        for msg_id in msg_ids[start:start + batch_size]:
+            batch.add(
+                service.users().messages().get(userId='me', id=msg_id, format='full'),
+                request_id=msg_id
+            )
+        batch.execute()
+
+    return details
+
+def _parse_message(msg):
+    """Extract sender, subject, date, and plain body from a message payload."""
     headers = msg['payload'].get('headers', [])
     subject = sender = date = "N/A"
     for h in headers:
@@ -47,24 +124,20 @@ def get_message_details(service, msg_id):
         elif h['name'] == 'Date':
             date = h['value']
 
-    # Try to find HTML or plain body
-    parts = msg['payload'].get('parts', [])
+    # Try to find HTML or plain body, descending into nested multiparts
+    # (multipart/alternative children that a flat scan would miss)
     body = ""
-    if parts:
-        for part in parts:
-            if part['mimeType'] in ['text/html', 'text/plain']:
-                data = part['body'].get('data')
-                if data:
-                    decoded_data = base64.urlsafe_b64decode(data).decode('utf-8')
-                    soup = BeautifulSoup(decoded_data, 'html.parser')
-                    body = soup.get_text()
-                    break
-    else:
-        data = msg['payload'].get('body', {}).get('data')
-        if data:
+    queue = [msg['payload']]
+    while queue:
+        part = queue.pop(0)
+        data = part.get('body', {}).get('data')
+        mime_type = part.get('mimeType', '')
+        if data and mime_type in ('text/html', 'text/plain'):
             decoded_data = base64.urlsafe_b64decode(data).decode('utf-8')
-            soup = BeautifulSoup(decoded_data, 'html.parser')
-            body = soup.get_text()
+            # Plain text needs no parsing at all
+            body = _html_to_text(decoded_data) if mime_type == 'text/html' else decoded_data
+            break
+        queue.extend(part.get('parts', []))
 
     return {
         'subject': subject,
@@ -80,11 +153,15 @@ def extract_emails_for_company(user_tag, company_name):
     messages = search_messages(service, query)
     print(f"\n🔎 Found {len(messages)} emails related to: {company_name}")
 
+    msg_ids = [msg['id'] for msg in messages]
+    details_map = fetch_message_details_batch(service, msg_ids)
+
     email_data = []
-    for msg in messages:
-        msg_id = msg['id']
-        details = get_message_details(service, msg_id)
-        
+    for msg_id in msg_ids:
+        details = details_map.get(msg_id)
+        if not details:
+            continue
+
         # Convert to standardized format
         email_data.append({
             'headline': details['subject'],
@@ -99,6 +176,19 @@ def extract_emails_for_company(user_tag, company_name):
     
     return email_data
 
+# Reuse a prior run's JSON for the same company if it's newer than this
+RESULT_TTL = 6 * 3600
+
+def _load_fresh_result(path, ttl=RESULT_TTL):
+    """Return parsed JSON from a prior run if it is recent and non-empty."""
+    try:
+        if time.time() - os.path.getmtime(path) < ttl and os.path.getsize(path) > 2:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+    except (OSError, ValueError):
+        pass
+    return None
+
 def get_company_gmail_data(company_name: str):
     """
     Main function to get Gmail data for a company
@@ -106,14 +196,20 @@ def get_company_gmail_data(company_name: str):
     """
     print(f"[GMAIL] Processing Gmail data for: {company_name}")
 
+    filename = f"gmail_{company_slug(company_name)}.json"
+    cached = _load_fresh_result(filename)
+    if cached is not None:
+        print(f"[CACHE] Reusing recent Gmail data from {filename}")
+        return cached
+
     try:
         user_tag = "portfolio@elevationai.com"
         gmail_data = extract_emails_for_company(user_tag, company_name)
 
-        # Save Gmail data to JSON file
-        filename = f"gmail_{company_name.replace(' ', '_').replace('.', '').lower()}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(gmail_data, f, indent=2, ensure_ascii=False)
+        # Save Gmail data to JSON file; orjson emits bytes in one shot and
+        # the 1 MiB buffer keeps syscall count low for large mailboxes
+        with open(filename, 'wb', buffering=1024 * 1024) as f:
+            f.write(orjson.dumps(gmail_data, option=orjson.OPT_INDENT_2))
         print(f"[SAVE] Gmail data saved to {filename}")
 
         print(f"[SUCCESS] Found {len(gmail_data)} Gmail messages for {company_name}")
@@ -125,8 +221,14 @@ def get_company_gmail_data(company_name: str):
 
 # ========= ENTRY POINT =========
 if __name__ == "__main__":
+    import sys
     user_tag = "portfolio@elevationai.com"
-    company = input("Enter company name to search emails for: ").strip()
+    # Scripted callers pass the company on argv; the prompt stays for
+    # interactive use
+    if len(sys.argv) > 1:
+        company = sys.argv[1].strip()
+    else:
+        company = input("Enter company name to search emails for: ").strip()
     result = get_company_gmail_data(company)
     
     print(f"\n[GMAIL] Gmail Summary for {company}:")
@@ -1,71 +1,304 @@
+import asyncio
+import aiohttp
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
+from functools import lru_cache
+from urllib.parse import urlsplit
+import hashlib
 import json
+import time
+from pathlib import Path
 from config import GOOGLE_SEARCH_API_KEY, GOOGLE_CSE_ID, DEFAULT_DATE_RANGE_DAYS
 
+# On-disk cache for billable CSE calls (refreshed daily) and parsed articles
+# (stable for a week); repeat runs over the same companies skip both the
+# search quota burn and the article fetches
+_CACHE_DIR = Path('.gcse_cache')
+_SEARCH_TTL = 86400
+_ARTICLE_TTL = 7 * 86400
+
+
+def _cache_get(key, ttl):
+    path = _CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            return json.loads(path.read_text())
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _cache_set(key, value):
+    try:
+        _CACHE_DIR.mkdir(exist_ok=True)
+        (_CACHE_DIR / f"{key}.json").write_text(json.dumps(value))
+    except OSError:
+        pass
+
+# Shared session: keep-alive reuses sockets to googleapis.com and article
+# hosts instead of paying a TCP+TLS handshake per request. Safe to share
+# across company workers: the API key travels in query params and requests
+# only reads the Session here, so concurrent .get calls touch nothing but
+# urllib3's thread-safe connection pool
+SESSION = requests.Session()
+# brotli/gzip bodies are 5-10x smaller from most news sites; requests
+# decompresses transparently (br needs the optional brotli package)
+SESSION.headers.update({
+    "Connection": "keep-alive",
+    "Accept-Encoding": "gzip, deflate, br",
+    "User-Agent": "Mozilla/5.0 (portfolio-agent)"
+})
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.3)
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
 def google_search(query, start_date, end_date, api_key, cse_id, num=10):
     """
     Perform a Google Custom Search for the given query and date range.
     """
+    cache_key = hashlib.sha1(
+        f"{query}|{cse_id}|{start_date}|{end_date}|{num}".encode()
+    ).hexdigest()
+    cached = _cache_get(cache_key, _SEARCH_TTL)
+    if cached is not None:
+        return cached
+
     search_url = 'https://www.googleapis.com/customsearch/v1'
-    results = []
-    start = 1
-
-    while start < num:
-        params = {
-            'q': query,
-            'cx': cse_id,
-            'key': api_key,
-            'num': min(10, num - start + 1),
-            'start': start,
-            'sort': f'date:r:{start_date}:{end_date}',
-        }
-        response = requests.get(search_url, params=params)
+    base = {
+        'q': query,
+        'cx': cse_id,
+        'key': api_key,
+        'sort': f'date:r:{start_date}:{end_date}',
+    }
+
+    def _page(start):
+        params = {**base, 'start': start, 'num': min(10, num - start + 1)}
+        response = SESSION.get(search_url, params=params)
+        response.raise_for_status()
         data = response.json()
-        items = data.get('items', [])
-        results.extend(items)
-        start += 10
-        if 'nextPage' not in data.get('queries', {}):
-            break
+        # CSE reports quota/config problems in an 'error' body with a 200
+        # in some proxy setups; never let those cache as "no news"
+        if 'error' in data:
+            raise RuntimeError(f"CSE error: {data['error'].get('message', data['error'])}")
+        return data
+
+    # CSE caps each request at 10 items; fetch the pages concurrently
+    # instead of walking them serially (the old loop also misread the
+    # dict-of-lists 'queries' schema and could stop a page early)
+    starts = list(range(1, num + 1, 10))
+    with ThreadPoolExecutor(max_workers=len(starts)) as executor:
+        responses = list(executor.map(_page, starts))
+
+    results = []
+    for data in responses:
+        results.extend(data.get('items', []))
+
+    _cache_set(cache_key, results)
     return results
 
-def extract_article_details(url):
+async def _fetch(session, url):
+    """Fetch a single URL and return the raw response body"""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        return await response.read()
+
+
+async def _fetch_and_parse(sem, session, url):
+    url_key = hashlib.sha1(url.encode()).hexdigest()
+    cached = _cache_get(url_key, _ARTICLE_TTL)
+    if cached is not None:
+        return cached
+
+    async with sem:
+        body = await _fetch(session, url)
+    # Parsing is pure CPU; run it in a worker thread (libxml2 releases the
+    # GIL) so it doesn't stall the other in-flight fetches
+    article = await asyncio.to_thread(_parse_article, url, body)
+    if article:
+        _cache_set(url_key, article)
+    return article
+
+
+async def _fetch_all_articles(urls):
+    """Fetch and parse all article URLs concurrently"""
+    # Normalize (drop fragments/utm params) and dedupe up front so
+    # syndicated variants of the same article are fetched once and the
+    # disk cache keys line up with the sync extraction path
+    urls = list(dict.fromkeys(_normalize_url(url) for url in urls))
+    sem = asyncio.Semaphore(20)
+    connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(
+            *[_fetch_and_parse(sem, session, url) for url in urls],
+            return_exceptions=True
+        )
+
+    articles = []
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching {url}: {result}")
+        elif result:
+            articles.append(result)
+    return articles
+
+
+def _normalize_url(url):
+    """Drop fragments and utm_* tracking params so syndicated links shared
+    across companies hit the same cache entry."""
+    parts = urlsplit(url)
+    query = '&'.join(
+        pair for pair in parts.query.split('&')
+        if pair and not pair.startswith('utm_')
+    )
+    return parts._replace(query=query, fragment='').geturl()
+
+
+@lru_cache(maxsize=2048)
+def _extract_cached(normalized_url, detail):
+    return _extract_article_details(normalized_url, detail)
+
+
+def extract_article_details(url, detail='full'):
+    """
+    Fetch and parse the article content from the given URL.
+
+    Repeated links across companies (industry roundups, press-release
+    aggregators) are served from an in-process LRU on top of the disk
+    cache, keyed by the URL minus tracking params.
+    """
+    return _extract_cached(_normalize_url(url), detail)
+
+
+def _extract_article_details(url, detail='full'):
     """
     Fetch and parse the article content from the given URL.
+
+    ``detail='summary'`` skips paragraph assembly and reuses the meta
+    description as content — for callers that only need headline,
+    description and date. Results fetched from CSE pagemap metadata
+    (see _article_from_cse) avoid the fetch entirely.
     """
+    url_key = hashlib.sha1(url.encode()).hexdigest()
+    cached = _cache_get(url_key, _ARTICLE_TTL)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Attempt to extract the publication date
-        date = None
-        for meta in soup.find_all('meta'):
-            if meta.get('property') in ['article:published_time', 'og:pubdate', 'pubdate']:
-                date = meta.get('content')
-                break
+        response = SESSION.get(url, timeout=10)
+        article = _parse_article(url, response.content, detail)
+        if article:
+            _cache_set(url_key, article)
+        return article
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+# Stop collecting paragraph text past this point; long pages are mostly
+# nav/footer boilerplate and downstream prompts truncate anyway
+_CONTENT_BUDGET = 8000
+
+
+def _join_paragraphs(texts):
+    buf = []
+    total = 0
+    for t in texts:
+        t = t.strip()
+        if not t:
+            continue
+        buf.append(t)
+        total += len(t)
+        if total > _CONTENT_BUDGET:
+            break
+    return '\n'.join(buf)
+
+
+def _parse_article(url, body, detail='full'):
+    """
+    Parse article content from raw HTML.
+
+    Prefers selectolax (Modest's C tree, lazy node objects) which builds
+    and queries the tree several times faster than BeautifulSoup; falls
+    back to the lxml-backed soup when selectolax isn't installed.
+    """
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        return _parse_article_soup(url, body, detail)
+
+    try:
+        tree = HTMLParser(body)
+
+        def _meta(selector):
+            node = tree.css_first(selector)
+            return node.attributes.get('content', '') if node else ''
+
+        date = (_meta('meta[property="article:published_time"]')
+                or _meta('meta[property="og:pubdate"]')
+                or _meta('meta[property="pubdate"]'))
         if not date:
             # Fallback: use current date
             date = datetime.now().isoformat() + 'Z'
 
-        # Extract headline
-        headline = soup.title.string if soup.title else ''
+        title_node = tree.css_first('title')
+        headline = title_node.text() if title_node else ''
+        description = _meta('meta[name="description"]')
+        image_url = _meta('meta[property="og:image"]')
+        if detail == 'summary':
+            full_content = description
+        else:
+            full_content = _join_paragraphs(n.text() for n in tree.css('p'))
 
-        # Extract description
-        description = ''
-        desc_meta = soup.find('meta', attrs={'name': 'description'})
-        if desc_meta:
-            description = desc_meta.get('content', '')
+        return {
+            'date': date,
+            'headline': headline,
+            'description': description,
+            'url': url,
+            'image_url': image_url,
+            'full_content': full_content
+        }
+    except Exception as e:
+        print(f"Error parsing {url}: {e}")
+        return None
 
-        # Extract full content
-        paragraphs = soup.find_all('p')
-        full_content = '\n'.join([p.get_text() for p in paragraphs])
 
-        # Extract image URL
-        image_url = ''
-        og_image = soup.find('meta', property='og:image')
-        if og_image:
-            image_url = og_image.get('content', '')
+def _parse_article_soup(url, body, detail='full'):
+    try:
+        soup = BeautifulSoup(body, 'lxml')
+
+        # One walk over the tree instead of separate find/find_all passes
+        # for date, title, description, image and paragraphs
+        date = headline = description = image_url = ''
+        paragraphs = []
+        para_total = 0
+        for el in soup.find_all(['meta', 'title', 'p']):
+            if el.name == 'meta':
+                prop = el.get('property')
+                if prop in ('article:published_time', 'og:pubdate', 'pubdate'):
+                    date = date or el.get('content', '')
+                elif prop == 'og:image':
+                    image_url = image_url or el.get('content', '')
+                elif el.get('name') == 'description':
+                    description = description or el.get('content', '')
+            elif el.name == 'title':
+                headline = headline or (el.string or '')
+            elif detail != 'summary' and para_total <= _CONTENT_BUDGET:
+                text = el.get_text(strip=True)
+                if text:
+                    paragraphs.append(text)
+                    para_total += len(text)
+
+        if not date:
+            # Fallback: use current date
+            date = datetime.now().isoformat() + 'Z'
+        full_content = description if detail == 'summary' else '\n'.join(paragraphs)
 
         return {
             'date': date,
@@ -76,9 +309,35 @@ def extract_article_details(url):
             'full_content': full_content
         }
     except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        print(f"Error parsing {url}: {e}")
         return None
 
+def _article_from_cse(item):
+    """Build an article dict from a CSE result's pagemap metadata alone.
+
+    Returns None when the metadata lacks a publication date, meaning the
+    page itself still needs to be fetched.
+    """
+    pagemap = item.get('pagemap', {})
+    metatags = (pagemap.get('metatags') or [{}])[0]
+    date = (metatags.get('article:published_time')
+            or metatags.get('og:pubdate')
+            or metatags.get('pubdate'))
+    if not date:
+        return None
+    image_url = (metatags.get('og:image')
+                 or (pagemap.get('cse_image') or [{}])[0].get('src', ''))
+    snippet = item.get('snippet', '')
+    return {
+        'date': date,
+        'headline': item.get('title', ''),
+        'description': snippet,
+        'url': item['link'],
+        'image_url': image_url,
+        'full_content': snippet
+    }
+
+
 def fetch_company_news(company_name, start_date_str=None, end_date_str=None):
     """
     Fetch news articles for the specified company within the date range.
@@ -93,11 +352,19 @@ def fetch_company_news(company_name, start_date_str=None, end_date_str=None):
     articles = []
     try:
         search_results = google_search(f"{company_name} news", start_date_str, end_date_str, GOOGLE_SEARCH_API_KEY, GOOGLE_CSE_ID, num=20)
+        # Most CSE results already carry title/snippet/date/image in their
+        # pagemap; only the remainder needs a full page fetch
+        from_metadata = []
+        urls = []
         for item in search_results:
-            url = item.get('link')
-            article = extract_article_details(url)
+            if not item.get('link'):
+                continue
+            article = _article_from_cse(item)
             if article:
-                articles.append(article)
+                from_metadata.append(article)
+            else:
+                urls.append(item['link'])
+        articles = from_metadata + asyncio.run(_fetch_all_articles(urls))
     except Exception as e:
         print(f"Error fetching Google search results for {company_name}: {e}")
 
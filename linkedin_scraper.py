@@ -1,11 +1,10 @@
-import time, io, csv, logging, os, json
+import time, io, csv, heapq, logging, os, shutil, threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
-import gspread
-import pandas as pd
-from oauth2client.service_account import ServiceAccountCredentials
-from langchain_community.document_loaders import CSVLoader
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
+from pathlib import Path
+from utils import company_slug
 
 # === CONFIG ===
 PHANTOM_API_KEY = "4bc5RrYLCBTapPWDChBZzETZecpneyIJor1e5VxEqaA"
@@ -22,35 +21,102 @@ HEADERS = {
 }
 DOWNLOAD_DIR = "phantom_results"
 
+# Reuse a prior run's JSON for the same company if it's newer than this;
+# skips the multi-minute Phantombuster round-trip on repeat analyses
+RESULT_TTL = 6 * 3600
+
+# Phantombuster agents are per-account; only one company's scrape may run
+# at a time even when the caller fans out across companies
+_PHANTOM_GATE = threading.Semaphore(1)
+
+# Shared keep-alive session for all Phantombuster/S3 traffic. Deliberately
+# one session across the company-pool workers (not thread-local): urllib3's
+# pool is thread-safe, auth rides in HEADERS, and no cookies are used, so
+# nothing on the Session mutates per request — while the Phantombuster
+# semaphore serializes the scrape itself anyway
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate, br"})
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=3
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 log = logging.getLogger("LinkedInScraper")
 
 # --- Helpers ---
-def get_sheet():
+@lru_cache(maxsize=1)
+def _gc():
+    """One OAuth token exchange per process, not per get_sheet() call."""
+    # Deferred so importing this module doesn't pay the gspread/oauth2client
+    # stack when only other collectors run
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     creds = ServiceAccountCredentials.from_json_keyfile_name(
         'credentials_linkedin.json',
         ['https://spreadsheets.google.com/feeds','https://www.googleapis.com/auth/drive']
     )
-    return gspread.authorize(creds).open_by_url(SHEET_URL).sheet1
+    return gspread.authorize(creds)
+
+@lru_cache(maxsize=1)
+def _llm():
+    from langchain_google_genai import GoogleGenerativeAI
+    return GoogleGenerativeAI(model="models/gemini-2.0-flash", google_api_key=GEMINI_API_KEY)
+
+def get_sheet():
+    return _gc().open_by_url(SHEET_URL).sheet1
 
 def clear_and_write(sheet, company):
-    sheet.clear()
-    sheet.append_row(["company"])
-    sheet.append_row([company.strip()])
-    log.info(f"✅ Sheet updated for '{company}'")
+    # One ranged update instead of clear + two append_row round-trips
+    sheet.batch_clear(['A1:Z1000'])
+    sheet.update('A1:A2', [["company"], [company.strip()]], value_input_option='RAW')
+    log.info("✅ Sheet updated for '%s'", company)
 
 def launch_agent(agent_id, payload=None):
     url = f"https://api.phantombuster.com/api/v1/agent/{agent_id}/launch"
-    res = requests.post(url, headers=HEADERS, json=payload or {})
+    res = SESSION.post(url, headers=HEADERS, json=payload or {})
     res.raise_for_status()
     cid = res.json().get("data", {}).get("containerId")
     if not cid:
         raise Exception(f"No containerId returned for agent {agent_id}")
-    log.info(f"✈ Launched agent {agent_id} (container {cid})")
+    log.info("✈ Launched agent %s (container %s)", agent_id, cid)
+    return cid
+
+def wait_done(container_ids, timeout=300):
+    """Poll the launched containers until every Phantom run has finished
+    (or timeout).
+
+    Polling the containers from this launch — not the agents' last-run
+    status, which would already read "finished" from the previous run —
+    guarantees we never download a stale result.csv. Backoff doubles
+    1→2→4→8 s and caps at 10 s, so a fast run is picked up within
+    seconds instead of waiting out a fixed timer.
+    """
+    deadline = time.time() + timeout
+    pending = set(container_ids)
+    interval = 1
+    while pending and time.time() < deadline:
+        for cid in list(pending):
+            r = SESSION.get("https://api.phantombuster.com/api/v2/containers/fetch",
+                            headers=HEADERS, params={"id": cid})
+            r.raise_for_status()
+            if r.json().get("status") == "finished":
+                pending.discard(cid)
+        if pending:
+            time.sleep(interval)
+            interval = min(interval * 2, 10)
+    if pending:
+        log.warning("⏱ Timed out waiting for containers: %s", sorted(pending))
+    else:
+        log.info("✅ All agents finished")
 
 def download_via_s3(agent_id):
-    r = requests.get("https://api.phantombuster.com/api/v2/agents/fetch",
-                     headers=HEADERS, params={"id": agent_id})
+    r = SESSION.get("https://api.phantombuster.com/api/v2/agents/fetch",
+                    headers=HEADERS, params={"id": agent_id})
     r.raise_for_status()
     res = r.json()
     s3 = res.get("s3Folder")
@@ -58,32 +124,86 @@ def download_via_s3(agent_id):
     if not s3 or not org:
         raise Exception("Missing s3Folder/orgS3Folder—results not ready")
     url = f"https://phantombuster.s3.amazonaws.com/{org}/{s3}/result.csv"
-    log.info(f"📥 Downloading CSV from S3: {url}")
-    resp = requests.get(url)
-    resp.raise_for_status()
+    log.info("📥 Downloading CSV from S3: %s", url)
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
     path = os.path.join(DOWNLOAD_DIR, "latest.csv")
-    with open(path, "wb") as f:
-        f.write(resp.content)
+    # Stream straight to disk so a large export never sits in memory whole
+    with SESSION.get(url, stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        with open(path, "wb") as f:
+            shutil.copyfileobj(resp.raw, f, length=1 << 20)
     log.info("✅ CSV downloaded successfully")
     return path
 
 def download_and_filter(company_term):
     raw_path = download_via_s3(PHANTOMS["activity_explorer"])
-    df = pd.read_csv(raw_path)
-    df_filtered = df[df['profileUrl'].str.contains(company_term, case=False, na=False)]
-    if df_filtered.empty:
-        raise Exception(f"No entries found for '{company_term}'")
-    df_filtered['timestamp'] = pd.to_datetime(df_filtered['timestamp'])
-    df_latest = df_filtered.sort_values('timestamp', ascending=False).head(5)
     filtered_path = os.path.join(DOWNLOAD_DIR, "filtered_latest.csv")
-    df_latest.to_csv(filtered_path, index=False)
+
+    try:
+        from pyarrow import csv as pacsv, compute as pc
+    except ImportError:
+        return _filter_with_csv(raw_path, company_term, filtered_path)
+
+    # Arrow's multithreaded C++ CSV parser avoids pandas' object-dtype
+    # blow-up on multi-MB Phantombuster exports
+    tbl = pacsv.read_csv(raw_path)
+    mask = pc.match_substring(
+        pc.utf8_lower(tbl.column('profileUrl').cast('string')),
+        company_term.lower()
+    )
+    tbl = tbl.filter(mask)
+    if tbl.num_rows == 0:
+        raise Exception(f"No entries found for '{company_term}'")
+
+    try:
+        ts = tbl.column('timestamp').cast('timestamp[ms]')
+        tbl = tbl.set_column(tbl.schema.get_field_index('timestamp'), 'timestamp', ts)
+    except Exception:
+        # ISO-8601 strings sort the same lexicographically
+        pass
+
+    idx = pc.sort_indices(tbl, sort_keys=[('timestamp', 'descending')])[:5]
+    pacsv.write_csv(tbl.take(idx), filtered_path)
+    log.info("✅ Filtered CSV created")
+    return filtered_path
+
+def _filter_with_csv(raw_path, company_term, filtered_path):
+    """Single-pass stdlib fallback: heap of the 5 newest matching rows.
+
+    O(N log 5) time and O(5) rows of memory, no DataFrame needed for
+    row-wise filtering.
+    """
+    term = company_term.lower()
+    top = []
+    with open(raw_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        for i, row in enumerate(reader):
+            if term not in (row.get('profileUrl') or '').lower():
+                continue
+            entry = (row.get('timestamp') or '', -i, row)
+            if len(top) < 5:
+                heapq.heappush(top, entry)
+            else:
+                heapq.heappushpop(top, entry)
+    if not top:
+        raise Exception(f"No entries found for '{company_term}'")
+    with open(filtered_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for _, _, row in sorted(top, reverse=True):
+            writer.writerow(row)
     log.info("✅ Filtered CSV created")
     return filtered_path
 
 def analyze_with_gemini(path, company):
-    docs = CSVLoader(file_path=path).load()
-    llm = GoogleGenerativeAI(model="models/gemini-2.0-flash", google_api_key=GEMINI_API_KEY)
+    # The filtered CSV is only 5 rows; pass its text straight into the
+    # prompt instead of wrapping every row in a LangChain Document that
+    # would just get stringified again
+    from langchain_core.prompts import PromptTemplate
+
+    context_text = Path(path).read_text(encoding='utf-8')
+    llm = _llm()
     prompt = PromptTemplate(
         input_variables=["context","company"],
         template="""
@@ -97,16 +217,25 @@ Summarize:
 4. Noteworthy posts
 """
     )
-    result = (prompt | llm).invoke({"context": docs, "company": company})
+    result = (prompt | llm).invoke({"context": context_text, "company": company})
     log.info("🎯 Gemini analysis complete")
     return result
 
 def delete_all_outputs():
     for pid in PHANTOMS.values():
-        requests.delete("https://api.phantombuster.com/api/v2/agents/fetch-output",
-                        headers=HEADERS, params={"id": pid})
+        SESSION.delete("https://api.phantombuster.com/api/v2/agents/fetch-output",
+                       headers=HEADERS, params={"id": pid})
     log.info("🗑 Cleanup done")
 
+def _load_fresh_result(path, ttl=RESULT_TTL):
+    """Return parsed JSON from a prior run if it is recent and non-empty."""
+    try:
+        if time.time() - os.path.getmtime(path) < ttl and os.path.getsize(path) > 2:
+            return orjson.loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        pass
+    return None
+
 def get_company_linkedin_data(company_name: str):
     """
     Main function to get LinkedIn data for a company
@@ -114,25 +243,38 @@ def get_company_linkedin_data(company_name: str):
     """
     print(f"🔗 Processing LinkedIn data for: {company_name}")
 
+    filename = f"linkedin_{company_slug(company_name)}.json"
+    cached = _load_fresh_result(filename)
+    if cached is not None:
+        print(f"♻️ Reusing recent LinkedIn data from {filename}")
+        return cached
+
     try:
-        sheet = get_sheet()
-        clear_and_write(sheet, company_name)
+        with _PHANTOM_GATE:
+            sheet = get_sheet()
+            clear_and_write(sheet, company_name)
 
-        # Launch all Phantoms
-        launch_agent(PHANTOMS["company_url_finder"], {"argument": {"spreadsheetUrl": SHEET_URL}})
-        launch_agent(PHANTOMS["employee_export"])
-        launch_agent(PHANTOMS["activity_explorer"])
+            # Launch all Phantoms concurrently — three independent API
+            # calls cost max(latency) instead of sum(latency)
+            launches = [
+                (PHANTOMS["company_url_finder"], {"argument": {"spreadsheetUrl": SHEET_URL}}),
+                (PHANTOMS["employee_export"], None),
+                (PHANTOMS["activity_explorer"], None),
+            ]
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                container_ids = list(pool.map(lambda t: launch_agent(*t), launches))
 
-        # Start static 2‑minute countdown immediately
-        log.info("⏳ Started 2‑minute timer…")
-        time.sleep(120)
+            # Poll until the Phantoms report done rather than sleeping a
+            # fixed 2 minutes (too long for fast runs, too short under load)
+            log.info("⏳ Waiting for agents to finish…")
+            wait_done(container_ids)
 
-        # Download, filter, analyze
-        result_path = download_and_filter(company_name)
-        summary = analyze_with_gemini(result_path, company_name)
+            # Download, filter, analyze
+            result_path = download_and_filter(company_name)
+            summary = analyze_with_gemini(result_path, company_name)
 
-        # Clean up
-        delete_all_outputs()
+            # Clean up
+            delete_all_outputs()
 
         # Convert to standardized format
         linkedin_data = [{
@@ -145,17 +287,15 @@ def get_company_linkedin_data(company_name: str):
             'date': time.strftime('%Y-%m-%d')
         }]
 
-        # Save LinkedIn data to JSON file
-        filename = f"linkedin_{company_name.replace(' ', '_').replace('.', '').lower()}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(linkedin_data, f, indent=2, ensure_ascii=False)
+        # Save LinkedIn data to JSON file (orjson writes bytes in one shot)
+        Path(filename).write_bytes(orjson.dumps(linkedin_data, option=orjson.OPT_INDENT_2))
         print(f"💾 LinkedIn data saved to {filename}")
 
         print(f"✅ Found LinkedIn data for {company_name}")
         return linkedin_data
 
     except Exception as e:
-        log.error(f"❌ LinkedIn scraping failed for {company_name}: {e}")
+        log.error("❌ LinkedIn scraping failed for %s: %s", company_name, e)
         return []
 
 # --- Main Workflow (for standalone testing) ---
@@ -14,6 +14,8 @@ The script will prompt for company names and generate HTML reports.
 import os
 import sys
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
@@ -21,6 +23,7 @@ from typing import List, Dict, Any
 from data_aggregator import DataAggregator
 from gemini_processor import GeminiProcessor
 from portfolio_synthesizer import PortfolioSynthesizer
+from utils import company_slug
 
 # Import data collection modules
 try:
@@ -53,6 +56,8 @@ except ImportError as e:
     print(f"Warning: LinkedIn module not available: {e}")
     get_company_linkedin_data = None
 
+log = logging.getLogger(__name__)
+
 
 class PortfolioAnalyzer:
     def __init__(self):
@@ -107,66 +112,48 @@ class PortfolioAnalyzer:
         print(f"Collecting data for: {company_name}")
         print(f"{'='*50}")
 
-        # Initialize data containers
-        blog_data = []
-        google_data = []
-        reddit_data = []
-        youtube_data = []
-        linkedin_data = []
-
-        # Collect blog data
-        if get_company_blog_data:
-            try:
-                print("\n📝 Collecting blog posts...")
-                blog_data = get_company_blog_data(company_name)
-            except Exception as e:
-                print(f"Error collecting blog data: {e}")
-
-        # Collect Google search data
-        if get_company_google_data:
+        # Each source is an independent network-bound pipeline, so run all
+        # five concurrently; wall time becomes max(source_time) instead of
+        # the sum (LinkedIn's Phantom wait usually dominates)
+        sources = {
+            'blog': ('📝 Collecting blog posts...', get_company_blog_data),
+            'google': ('🔍 Collecting Google search results...', get_company_google_data),
+            'reddit': ('🔴 Collecting Reddit posts...', get_company_reddit_data),
+            'youtube': ('📺 Collecting YouTube videos...', get_company_youtube_data),
+            'linkedin': ('👥 Collecting LinkedIn posts...', get_company_linkedin_data),
+        }
+
+        def _collect(name, label, collector):
+            print(f"\n{label}")
             try:
-                print("\n🔍 Collecting Google search results...")
-                google_data = get_company_google_data(company_name)
+                return collector(company_name) or []
             except Exception as e:
-                print(f"Error collecting Google data: {e}")
-
-        # Collect Reddit data
-        if get_company_reddit_data:
-            try:
-                print("\n🔴 Collecting Reddit posts...")
-                reddit_data = get_company_reddit_data(company_name)
-            except Exception as e:
-                print(f"Error collecting Reddit data: {e}")
-
-        # Collect YouTube data
-        if get_company_youtube_data:
-            try:
-                print("\n📺 Collecting YouTube videos...")
-                youtube_data = get_company_youtube_data(company_name)
-            except Exception as e:
-                print(f"Error collecting YouTube data: {e}")
-
-        # Collect LinkedIn data
-        if get_company_linkedin_data:
-            try:
-                print("\n👥 Collecting LinkedIn posts...")
-                linkedin_data = get_company_linkedin_data(company_name)
-            except Exception as e:
-                print(f"Error collecting LinkedIn data: {e}")
+                print(f"Error collecting {name} data: {e}")
+                return []
+
+        results = {name: [] for name in sources}
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = {
+                name: executor.submit(_collect, name, label, collector)
+                for name, (label, collector) in sources.items()
+                if collector
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
 
         # Aggregate all data
         print("\n[DATA] Aggregating data...")
         aggregated_data = self.aggregator.aggregate_company_data(
             company_name=company_name,
-            blog_data=blog_data,
-            google_data=google_data,
-            reddit_data=reddit_data,
-            youtube_data=youtube_data,
-            linkedin_data=linkedin_data
+            blog_data=results['blog'],
+            google_data=results['google'],
+            reddit_data=results['reddit'],
+            youtube_data=results['youtube'],
+            linkedin_data=results['linkedin']
         )
 
         # Save aggregated data
-        filename = f"aggregated_{company_name.replace(' ', '_').replace('.', '').lower()}.json"
+        filename = f"aggregated_{company_slug(company_name)}.json"
         self.aggregator.save_aggregated_data(aggregated_data, filename)
 
         print(f"\n[SUCCESS] Data collection complete for {company_name}")
@@ -183,24 +170,35 @@ class PortfolioAnalyzer:
 
         company_reports = {}
 
-        # Generate individual company reports
-        for company_name, company_data in companies_data.items():
-            print(f"\n[AI] Generating report for {company_name}...")
-            try:
-                html_report = self.gemini_processor.generate_company_report(company_data)
-                company_reports[company_name] = html_report
-                print(f"[SUCCESS] Report generated for {company_name}")
-            except Exception as e:
-                print(f"[ERROR] Error generating report for {company_name}: {e}")
-                # Create fallback report
-                company_reports[company_name] = self.gemini_processor.create_fallback_html(company_data)
+        # Generate all company reports in one bounded-concurrency batch so
+        # the LLM round trips cost roughly max() instead of sum(); failed
+        # companies fall back to the static report inside the batch
+        print(f"\n[AI] Generating reports for {len(companies_data)} companies...")
+        try:
+            reports = self.gemini_processor.generate_company_reports(
+                list(companies_data.values())
+            )
+            company_reports = dict(zip(companies_data.keys(), reports))
+            print(f"[SUCCESS] Reports generated for {len(company_reports)} companies")
+        except Exception as e:
+            # Serial fallback (e.g. aiohttp unavailable)
+            print(f"[ERROR] Concurrent report generation failed: {e}")
+            for company_name, company_data in companies_data.items():
+                print(f"\n[AI] Generating report for {company_name}...")
+                try:
+                    company_reports[company_name] = self.gemini_processor.generate_company_report(company_data)
+                    print(f"[SUCCESS] Report generated for {company_name}")
+                except Exception as e:
+                    print(f"[ERROR] Error generating report for {company_name}: {e}")
+                    # Create fallback report
+                    company_reports[company_name] = self.gemini_processor.create_fallback_html(company_data)
 
         # Combine reports if multiple companies
         if len(company_reports) == 1:
             # Single company - use individual report
             company_name = list(company_reports.keys())[0]
             final_html = company_reports[company_name]
-            output_filename = f"portfolio_report_{company_name.replace(' ', '_').replace('.', '').lower()}.html"
+            output_filename = f"portfolio_report_{company_slug(company_name)}.html"
         else:
             # Multiple companies - combine reports
             print(f"\n[COMBINE] Combining reports for {len(company_reports)} companies...")
@@ -235,10 +233,17 @@ class PortfolioAnalyzer:
 
             print(f"\nAnalyzing {len(companies)} companies: {', '.join(companies)}")
 
-            # Collect data for all companies
+            # Collect data for all companies concurrently; each company's
+            # pipeline is independent, so fan-out scales near-linearly up
+            # to API rate limits (Phantombuster is serialized internally)
             companies_data = {}
-            for company in companies:
-                companies_data[company] = self.collect_company_data(company)
+            with ThreadPoolExecutor(max_workers=min(len(companies), 4)) as executor:
+                futures = {
+                    company: executor.submit(self.collect_company_data, company)
+                    for company in companies
+                }
+                for company in companies:
+                    companies_data[company] = futures[company].result()
 
             # Generate reports
             result = self.generate_reports(companies_data)
@@ -271,14 +276,15 @@ class PortfolioAnalyzer:
 
         except KeyboardInterrupt:
             print("\n\nOperation cancelled by user.")
-        except Exception as e:
-            print(f"\n[ERROR] An error occurred: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            # Lazy formatting: the frame walk only happens if a handler
+            # accepts the record, and it routes to log files on servers
+            log.exception("An error occurred")
 
 
 def main():
     """Entry point"""
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
     analyzer = PortfolioAnalyzer()
     analyzer.run()
 
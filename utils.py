@@ -0,0 +1,13 @@
+"""Shared helpers for the portfolio pipeline."""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def company_slug(name: str) -> str:
+    """Canonical filesystem/GCS slug for a company name.
+
+    Memoized so batch runs over a fixed company list pay the string
+    transforms once, and so every call site produces the same slug.
+    """
+    return name.replace(' ', '_').replace('.', '').lower()